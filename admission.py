@@ -0,0 +1,181 @@
+import asyncio
+import math
+import os
+import time
+
+from fastapi import Depends, HTTPException
+
+from auth import get_token_subject
+
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> float:
+        """Takes a token; returns 0 on success, else seconds until one is available"""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def refund(self):
+        """Gives back a token taken for a request that was then shed"""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.burst
+
+
+class AdmissionController:
+    """
+    Guards one class of expensive endpoints in this process:
+    a token bucket per user, a global in-flight limit, and a short bounded
+    wait queue in front of it. Anything beyond that is rejected immediately.
+    """
+
+    # Idle (full) buckets are dropped once the table grows past this
+    MAX_BUCKETS = 10000
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float,
+                 rate: float, burst: int):
+        self.name = name
+        self.configured_in_flight = max_in_flight
+        self.configured_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._buckets = {}
+
+    def set_share(self, index: int, count: int):
+        """
+        Limits this process to its part of the in-flight cap when `count`
+        processes serve the same node; the shares sum to the configured cap.
+        A process left with no slot sheds every request for this class.
+        """
+        share, extra = divmod(self.configured_in_flight, count)
+        self.max_in_flight = share + (1 if index < extra else 0)
+        self.max_queue = self.configured_queue if self.max_in_flight else 0
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+
+    def _bucket(self, subject: str) -> TokenBucket:
+        bucket = self._buckets.get(subject)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_BUCKETS:
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.is_full()}
+            bucket = self._buckets[subject] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _reject(self, status_code: int, detail: str, retry_after: float):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    async def acquire(self, subject: str):
+        # Shedding for capacity must not cost the user a token, or their retry gets a 429
+        if self.is_saturated():
+            self._reject(503, "Server is busy, try again shortly", self.queue_timeout)
+
+        bucket = self._bucket(subject)
+        wait = bucket.try_take()
+        if wait > 0:
+            self._reject(429, "Too many requests, slow down", wait)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            bucket.refund()
+            self._reject(503, "Server is busy, try again shortly", self.queue_timeout)
+        except asyncio.CancelledError:
+            bucket.refund()
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    def is_saturated(self) -> bool:
+        """True when new requests would be rejected without waiting"""
+        return self.in_flight >= self.max_in_flight and self.waiting >= self.max_queue
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.waiting,
+            "max_queue": self.max_queue,
+            "rejected": self.rejected,
+            "saturated": self.is_saturated(),
+        }
+
+
+# MAX_IN_FLIGHT is per node: under gunicorn each worker gets a share of it
+# (see configure_worker). MAX_QUEUE, RATE_PER_MIN and BURST are per worker
+# process; buckets are not shared, so with N workers a user may get up to N
+# times the configured rate if their requests land on different workers.
+def _limits_from_env(prefix: str, max_in_flight: int, max_queue: int, queue_timeout: float,
+                     rate_per_min: float, burst: int) -> dict:
+    return {
+        "max_in_flight": int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", max_in_flight)),
+        "max_queue": int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+        "queue_timeout": float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", queue_timeout)),
+        "rate": float(os.getenv(f"{prefix}_RATE_PER_MIN", rate_per_min)) / 60,
+        "burst": int(os.getenv(f"{prefix}_BURST", burst)),
+    }
+
+
+# Endpoint classes: LLM + export pipeline, and resume ingestion (conversion + embedding)
+controllers = {
+    "generate": AdmissionController("generate", **_limits_from_env("GENERATE", 4, 8, 10.0, 6, 3)),
+    "ingest": AdmissionController("ingest", **_limits_from_env("INGEST", 4, 8, 10.0, 12, 5)),
+}
+
+
+def configure_worker(index: int, count: int):
+    """Called in each forked web worker: `index` is its slot among `count` workers"""
+    for controller in controllers.values():
+        controller.set_share(index, count)
+
+
+def admit(endpoint_class: str):
+    """Dependency factory: holds an admission slot for the duration of the request"""
+    controller = controllers[endpoint_class]
+
+    async def dependency(subject: str = Depends(get_token_subject)):
+        await controller.acquire(subject)
+        try:
+            yield
+        finally:
+            controller.release()
+
+    return dependency
+
+
+def saturation() -> dict:
+    """Per-endpoint-class load, for /health"""
+    return {name: controller.stats() for name, controller in controllers.items()}
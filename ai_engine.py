@@ -3,7 +3,7 @@ import json
 from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
-from schemas import ResumeFeedback, LinkedInDraft, ResumeEdit  # <--- Make sure ResumeEdit is imported
+from schemas import ResumeFeedback, LinkedInDraft, ResumeEdit, JobDescriptionDigest  # <--- Make sure ResumeEdit is imported
 
 # 1. Setup LLM
 llm = ChatGroq(
@@ -15,6 +15,7 @@ llm = ChatGroq(
 # 2. Define Parsers
 feedback_parser = PydanticOutputParser(pydantic_object=ResumeFeedback)
 message_parser = PydanticOutputParser(pydantic_object=LinkedInDraft)
+jd_digest_parser = PydanticOutputParser(pydantic_object=JobDescriptionDigest)
 
 # --- PROMPT 1: ANALYSIS, REWRITE & LOGGING (UPDATED) ---
 analysis_prompt = PromptTemplate(
@@ -103,9 +104,39 @@ draft_prompt = PromptTemplate(
     input_variables=["jd_text", "analysis_json"]
 )
 
+# --- PROMPT 3: JOB DESCRIPTION DIGEST (once per distinct JD) ---
+jd_digest_prompt = PromptTemplate(
+    template="""
+    You are a Technical Recruiter. Condense the Job Description (JD) into what a resume is screened against. Output ONLY JSON.
+
+    JOB DESCRIPTION:
+    {jd_text}
+
+    INSTRUCTIONS:
+    1. job_title: The role title as written in the JD.
+    2. keywords: EVERY skill, tool, technology, certification and domain keyword in the JD. Do not drop any.
+    3. requirements_summary: Requirements and responsibilities as short bullet lines.
+       Keep years of experience, degrees and must-haves. Drop company marketing, benefits and legal text.
+
+    OUTPUT FORMAT (Strict JSON):
+    {{
+        "job_title": "Senior Backend Engineer",
+        "keywords": ["Python", "AWS"],
+        "requirements_summary": "- 5+ years of backend development\\n- ..."
+    }}
+
+    CRITICAL OUTPUT RULES:
+    - Return ONLY valid JSON.
+    - Start with {{ and end with }}.
+    - No markdown code blocks.
+    """,
+    input_variables=["jd_text"]
+)
+
 # 4. Build Raw Chains
 analysis_chain_raw = analysis_prompt | llm 
 draft_chain_raw = draft_prompt | llm 
+jd_digest_chain_raw = jd_digest_prompt | llm 
 
 # --- HELPER FUNCTION TO CLEAN OUTPUT ---
 def clean_and_parse(raw_content, parser):
@@ -154,4 +185,13 @@ def run_agent_workflow(resume_text: str, jd_text: str):
         print(f"Draft Parsing Failed. Raw Output: {raw_response_2.content[:200]}...")
         raise e
     
-    return feedback_obj, message_obj
\ No newline at end of file
+    return feedback_obj, message_obj
+
+
+def run_jd_digest(jd_text: str):
+    raw_response = jd_digest_chain_raw.invoke({"jd_text": jd_text})
+    try:
+        return clean_and_parse(raw_response.content, jd_digest_parser)
+    except Exception as e:
+        print(f"JD Digest Parsing Failed. Raw Output: {raw_response.content[:200]}...")
+        raise e
@@ -42,25 +42,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Dependency to get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def get_token_subject(token: str = Depends(oauth2_scheme)) -> str:
+    """Dependency to get the JWT subject (user id) without a database lookup"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    
+        raise _credentials_exception()
+    return user_id
+
+
+async def get_current_user(
+    user_id: str = Depends(get_token_subject), 
+    db: Session = Depends(get_db)
+) -> models.User:
+    """Dependency to get the current authenticated user from JWT token"""
     user = db.query(models.User).filter(models.User.id == int(user_id)).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
@@ -0,0 +1,223 @@
+"""
+Micro-benchmarks for Jobalyze hot paths.
+
+Usage:
+    python benchmark.py pdf [--renders 40] [--workers N]
+    python benchmark.py cpu-scaling [--requests 48] [--max-workers N]
+    python benchmark.py serialize [--edits 40] [--iterations 2000]
+"""
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SAMPLE_RESUME = """# Jane Doe
+jane@example.com | +1 555 0100 | github.com/janedoe
+
+## Summary
+Backend engineer with 6 years of experience building Python and AWS services.
+
+## Skills
+- **Languages:** Python, Go, SQL
+- **Cloud:** AWS (Lambda, ECS, S3), Docker, Kubernetes
+- **Data:** PostgreSQL, Redis, Kafka
+
+## Experience
+### Senior Software Engineer - Acme Corp (2021 - Present)
+- Designed a FastAPI ingestion service processing 2M events/day on AWS ECS.
+- Cut p95 latency by 40% by introducing Redis caching and async I/O.
+- Mentored 4 engineers and led the migration from a monolith to microservices.
+
+### Software Engineer - Globex (2018 - 2021)
+- Built ETL pipelines with Kafka and PostgreSQL feeding the analytics platform.
+- Automated CI/CD with GitHub Actions and Terraform.
+
+## Education
+### B.Tech, Computer Science - State University (2014 - 2018)
+"""
+
+
+def _render_one(args):
+    from utils import render_resume_pdf
+    markdown_content, file_path = args
+    return render_resume_pdf(markdown_content, file_path)
+
+
+def bench_pdf(renders: int, workers: int):
+    """Markdown -> HTML -> PDF throughput, single process vs worker pool"""
+    # Import once in the parent so forked workers inherit the compiled template
+    import utils  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        # Distinct content per render so nothing is served from a cache
+        jobs = [
+            (f"{SAMPLE_RESUME}\n<!-- run {i} -->\n", os.path.join(out_dir, f"r{i}.pdf"))
+            for i in range(renders)
+        ]
+
+        start = time.perf_counter()
+        for job in jobs[: max(1, renders // 4)]:
+            _render_one(job)
+        serial_elapsed = time.perf_counter() - start
+        serial_rate = max(1, renders // 4) / serial_elapsed
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_render_one, jobs[:workers]))  # warm up workers
+            start = time.perf_counter()
+            results = list(pool.map(_render_one, jobs))
+            pool_elapsed = time.perf_counter() - start
+
+    pool_rate = renders / pool_elapsed
+    print(f"PDF render: {sum(results)}/{renders} ok")
+    print(f"  single process : {serial_rate:8.2f} renders/s")
+    print(f"  pool ({workers} workers): {pool_rate:8.2f} renders/s")
+    print(f"  per core       : {pool_rate / workers:8.2f} renders/s/core")
+
+
+def _init_worker():
+    # Same setup as gunicorn.conf.py post_fork
+    import torch
+    torch.set_num_threads(1)
+
+
+def _request_work(i):
+    """CPU-bound part of one generate request: chunk + embed the resume, render the PDF"""
+    from utils import render_resume_pdf
+    from vector_store import split_into_chunks, embed_chunks
+    text = f"{SAMPLE_RESUME * 4}\n{i}"
+    embed_chunks(text, split_into_chunks(text))
+    return render_resume_pdf(text, os.path.join(tempfile.gettempdir(), f"bench_{os.getpid()}.pdf"))
+
+
+def bench_cpu_scaling(requests: int, max_workers: int):
+    """
+    CPU-scaling proxy for multi-worker serving: runs the CPU-bound part of a
+    generate request (embed + render) in 1..N forked processes that share a
+    model preloaded in the parent.
+    This is not an end-to-end gunicorn measurement. It leaves out HTTP, the
+    LLM round trips, the database, admission control and the export pool,
+    so it only shows how far the CPU work scales with processes. Measure real
+    serving with a load generator against `gunicorn -c gunicorn.conf.py main:app`.
+    """
+    # Preload like gunicorn's preload_app, so workers share the model copy-on-write
+    import vector_store  # noqa: F401
+    import utils  # noqa: F401
+
+    counts = sorted({1, *[n for n in (2, 4, 8, 16, 32) if n < max_workers], max_workers})
+    fork = multiprocessing.get_context("fork")
+    base_rate = None
+    print(f"CPU scaling proxy ({requests} synthetic requests each, no HTTP/LLM/DB):")
+    for n in counts:
+        with ProcessPoolExecutor(max_workers=n, mp_context=fork, initializer=_init_worker) as pool:
+            list(pool.map(_request_work, range(n)))  # warm up workers
+            start = time.perf_counter()
+            list(pool.map(_request_work, range(requests)))
+            elapsed = time.perf_counter() - start
+        rate = requests / elapsed
+        base_rate = base_rate or rate
+        print(f"  {n:3d} processes: {rate:8.2f} req/s  speedup {rate / base_rate:5.2f}x  "
+              f"efficiency {rate / base_rate / n:6.1%}")
+
+
+def _sample_agent_response(edits: int):
+    from schemas import AgentResponse, ResumeFeedback, ResumeEdit, LinkedInDraft
+    return AgentResponse(
+        feedback=ResumeFeedback(
+            missing_skills=["Kubernetes", "Terraform", "GraphQL", "Spark"],
+            detailed_edits=[
+                ResumeEdit(
+                    section=f"Experience - Company {i}",
+                    change_type="Modification",
+                    original_text="Built backend services and maintained internal tools for the team.",
+                    new_text="Built Python/FastAPI backend services on AWS ECS and automated internal tooling with Terraform.",
+                    keywords_added=["Python", "FastAPI", "AWS", "Terraform"],
+                )
+                for i in range(edits)
+            ],
+            original_score=42,
+            optimized_score=91,
+            rewritten_content=SAMPLE_RESUME * 3,
+        ),
+        message=LinkedInDraft(
+            subject_line="Backend Engineer application - Jane Doe",
+            message_body="Dear Hiring Manager,\n\n" + "I am excited to apply for this role. " * 60,
+        ),
+        file_download_link="http://localhost:8000/download/final_0123456789abcdef.docx",
+        pdf_download_link="http://localhost:8000/download/resume_0123456789abcdef.pdf",
+    )
+
+
+def _time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def bench_serialize(edits: int, iterations: int):
+    """AgentResponse serialization time and bytes on the wire"""
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+    from schemas import AgentResponse
+    from serialization import to_json_bytes, parse_fields, brotli, GZIP_LEVEL, BROTLI_QUALITY
+
+    response = _sample_agent_response(edits)
+
+    print(f"AgentResponse serialization ({edits} edits, {iterations} iterations):")
+    encoders = {
+        "FastAPI default (jsonable_encoder + json)": lambda: json.dumps(jsonable_encoder(response)).encode("utf-8"),
+        "orjson on model_dump()": lambda: orjson.dumps(response.model_dump()),
+        "fast path (model_dump_json)": lambda: to_json_bytes(response),
+    }
+    for name, fn in encoders.items():
+        print(f"  {name:44s}: {_time_per_call(fn, iterations):8.1f} us")
+
+    print("Bytes on the wire:")
+    full = to_json_bytes(response)
+    scores_only = to_json_bytes(response, include=parse_fields(
+        AgentResponse, "feedback.original_score,feedback.optimized_score,feedback.detailed_edits"))
+    for label, body in (("full", full), ("scores + edits", scores_only)):
+        sizes = [f"raw {len(body):7d}", f"gzip {len(gzip.compress(body, compresslevel=GZIP_LEVEL)):7d}"]
+        if brotli is not None:
+            sizes.append(f"br {len(brotli.compress(body, quality=BROTLI_QUALITY)):7d}")
+        print(f"  {label:15s}: " + "  ".join(sizes))
+
+    gzip_us = _time_per_call(lambda: gzip.compress(full, compresslevel=GZIP_LEVEL), iterations // 10 or 1)
+    print(f"  gzip time (full)  : {gzip_us:8.1f} us")
+    if brotli is not None:
+        br_us = _time_per_call(lambda: brotli.compress(full, quality=BROTLI_QUALITY), iterations // 10 or 1)
+        print(f"  brotli time (full): {br_us:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jobalyze micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    pdf = sub.add_parser("pdf", help="PDF export renders per second per core")
+    pdf.add_argument("--renders", type=int, default=40)
+    pdf.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    cpu_scaling = sub.add_parser("cpu-scaling", help="Embed + render throughput from 1 to N preloaded processes "
+                                                     "(a CPU proxy, not end-to-end serving)")
+    cpu_scaling.add_argument("--requests", type=int, default=48)
+    cpu_scaling.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+
+    serialize = sub.add_parser("serialize", help="AgentResponse serialization time and payload size")
+    serialize.add_argument("--edits", type=int, default=40)
+    serialize.add_argument("--iterations", type=int, default=2000)
+
+    args = parser.parse_args()
+    if args.bench == "pdf":
+        bench_pdf(args.renders, args.workers)
+    elif args.bench == "cpu-scaling":
+        bench_cpu_scaling(args.requests, args.max_workers)
+    elif args.bench == "serialize":
+        bench_serialize(args.edits, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
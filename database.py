@@ -1,15 +1,61 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError, ProgrammingError
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./jobalyze.db"
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only
+    fcntl = None
+
+# Use a server database (e.g. PostgreSQL) when running several nodes
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./jobalyze.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}  # Required for SQLite
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},  # Required for SQLite
+    pool_pre_ping=not IS_SQLITE
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        """WAL lets readers and one writer from different workers proceed concurrently"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+
+def init_db():
+    """
+    Create tables once, even when several workers start at the same time.
+    Workers on one node serialize on a file lock; a worker on another node
+    that loses the race just sees the tables on retry.
+    """
+    import models  # noqa: F401  (registers tables on Base)
+
+    lock_file = open(os.getenv("DB_INIT_LOCK", "jobalyze.db.lock"), "w")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            Base.metadata.create_all(bind=engine)
+        except (OperationalError, ProgrammingError):
+            Base.metadata.create_all(bind=engine)
+    finally:
+        lock_file.close()
+
+
+def dispose_engine():
+    """Drop pooled connections inherited from the parent process (call after fork)"""
+    engine.dispose(close=False)
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
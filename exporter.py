@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils import render_resume_pdf, convert_pdf_to_docx, update_word_resume
+from storage import storage
+
+# Rendering is CPU-bound, so it runs in worker processes instead of the event loop
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", os.cpu_count() or 1))
+
+# Workers start from a clean forkserver, never by forking a web worker that
+# already runs torch/tokenizer threads
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_pool = None
+
+# Identical exports already running: cache key -> future shared by every caller
+_inflight = {}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared export worker pool"""
+    global _pool
+    if _pool is None:
+        context = multiprocessing.get_context(_START_METHOD)
+        if _START_METHOD == "forkserver":
+            # Import the rendering stack once in the server, not in every worker
+            context.set_forkserver_preload(["exporter"])
+        _pool = ProcessPoolExecutor(max_workers=EXPORT_WORKERS, mp_context=context)
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose worker died so the next export starts a fresh one"""
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    """Stop the export workers (called on app shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+
+
+def content_digest(*parts) -> str:
+    """SHA-256 over strings/bytes, used as the cache key for generated files"""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        h.update(part)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# --- Worker functions (run inside the pool, must stay top-level) ---
+
+def _build_base_docx(pdf_path: str, docx_path: str) -> bool:
+    tmp_path = f"{docx_path}.{os.getpid()}.tmp.docx"
+    if not convert_pdf_to_docx(pdf_path, tmp_path):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, docx_path)
+    return True
+
+
+def _build_edited_docx(base_docx_path: str, edits: list, docx_path: str) -> bool:
+    tmp_filename = f"{os.path.basename(docx_path)}.{os.getpid()}.tmp.docx"
+    tmp_path = update_word_resume(base_docx_path, edits, tmp_filename, output_dir=os.path.dirname(docx_path))
+    os.replace(tmp_path, docx_path)
+    return True
+
+
+# --- Cached + deduplicated exports ---
+
+async def _render_and_publish(name: str, fn, *args) -> bool:
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    try:
+        ok = await loop.run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM in pisa/pdf2docx); rebuild the pool and retry once
+        print("Export worker died, restarting the export pool")
+        _discard_pool(pool)
+        ok = await loop.run_in_executor(get_pool(), fn, *args)
+    if ok:
+        await asyncio.to_thread(storage.publish, name)
+    return ok
+
+
+async def _run_once(key: str, name: str, fn, *args):
+    """
+    Returns the local path of artifact `name`, rendering it in the pool only
+    if no worker has stored it yet. Concurrent calls in this process with the
+    same key wait on a single render.
+    """
+    output_path = storage.local_path(name)
+    # exists/fetch may be S3 round trips, so they stay off the event loop
+    if await asyncio.to_thread(storage.exists, name):
+        return output_path
+
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_render_and_publish(name, fn, *args))
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # shield: one cancelled request must not cancel the render for the others
+    ok = await asyncio.shield(future)
+    return output_path if ok else None
+
+
+async def export_pdf(markdown_content: str):
+    """
+    Renders the optimized Markdown resume to PDF.
+    Returns the file path, or None if rendering failed.
+    """
+    digest = content_digest(markdown_content)
+    name = f"resume_{digest}.pdf"
+    return await _run_once("pdf:" + digest, name, render_resume_pdf, markdown_content, storage.local_path(name))
+
+
+async def export_base_docx(pdf_path: str, source_digest: str):
+    """
+    Converts the uploaded PDF to an editable DOCX, once per distinct PDF.
+    Returns the file path, or None if conversion failed.
+    """
+    name = f"converted_{source_digest}.docx"
+    return await _run_once("base:" + source_digest, name, _build_base_docx, pdf_path, storage.local_path(name))
+
+
+async def export_docx(base_docx_path: str, source_digest: str, edits: list):
+    """
+    Applies edits to the base DOCX, once per distinct (resume, edits) pair.
+    edits: List of dicts [{'original_text': '...', 'new_text': '...'}]
+    """
+    digest = content_digest(source_digest, json.dumps(edits, sort_keys=True))
+    name = f"final_{digest}.docx"
+    if await asyncio.to_thread(storage.exists, name):
+        return storage.local_path(name)
+
+    # The base may be a request-private copy, or may have been converted on another node
+    base_local_path = base_docx_path
+    if not os.path.exists(base_local_path):
+        base_local_path = await asyncio.to_thread(storage.fetch, os.path.basename(base_docx_path))
+        if base_local_path is None:
+            return None
+    return await _run_once("docx:" + digest, name, _build_edited_docx, base_local_path, edits, storage.local_path(name))
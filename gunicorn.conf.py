@@ -0,0 +1,54 @@
+"""
+Multi-process serving:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app (and with it the MiniLM embedding model) is imported once in the
+master and shared copy-on-write by the forked workers. Tables are created
+once in the master before forking.
+For several nodes, set ARTIFACT_DIR to a shared mount or STORAGE_BACKEND=s3,
+and DATABASE_URL to a server database.
+"""
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", 180))
+
+# Split the export process pool across web workers instead of giving every worker cpu_count processes
+os.environ.setdefault("EXPORT_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+
+# *_MAX_IN_FLIGHT is split across workers (see post_fork); make sure each gets a slot by default
+os.environ.setdefault("GENERATE_MAX_IN_FLIGHT", str(max(4, workers)))
+os.environ.setdefault("INGEST_MAX_IN_FLIGHT", str(max(4, workers)))
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the GC's reach, so collections in
+    # the workers don't touch (and copy) the shared model pages
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Stable slot per worker, reused when a dead worker is replaced, so the
+    # in-flight shares always sum to the configured cap
+    taken = {getattr(w, "admission_index", None) for w in server.WORKERS.values()}
+    worker.admission_index = next(i for i in range(len(taken) + 1) if i not in taken)
+
+
+def post_fork(server, worker):
+    from database import dispose_engine
+    dispose_engine()
+
+    import admission
+    admission.configure_worker(worker.admission_index, server.num_workers)
+
+    # One intra-op thread per worker; parallelism comes from the processes
+    try:
+        import torch
+        torch.set_num_threads(int(os.getenv("TORCH_THREADS_PER_WORKER", 1)))
+    except ImportError:
+        pass
@@ -0,0 +1,58 @@
+import hashlib
+import re
+import unicodedata
+
+import numpy as np
+
+# Estimated Jaccard similarity of word shingles above which two JDs are the same posting
+NEAR_DUP_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+
+# 16 bands x 8 rows: P(share a band) = 1 - (1 - s^8)^16, i.e. ~61% at s=0.7,
+# ~95% at s=0.8 and >99.9% at s=0.9. A missed near-duplicate only costs one
+# extra query embedding, so recall just below the threshold is not critical.
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // NUM_BANDS
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed: signatures are persisted, so the permutations must never change
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalize_jd(jd_text: str) -> str:
+    """Lowercase, strip pasted HTML and punctuation noise, collapse whitespace"""
+    text = unicodedata.normalize("NFKC", jd_text).lower()
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"[^\w\s+#./-]", " ", text)  # keeps c++, c#, node.js, ci/cd
+    return " ".join(text.split())
+
+
+def minhash_signature(normalized_text: str) -> np.ndarray:
+    """MinHash over word shingles, as a uint32 vector"""
+    words = normalized_text.split()
+    shingles = {
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(max(1, len(words) - SHINGLE_SIZE + 1))
+    }
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles],
+        dtype=np.uint64
+    )
+    permuted = ((hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray) -> list:
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(NUM_BANDS)
+    ]
+
+
+def estimated_similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+    return float(np.mean(signature_a == signature_b))
@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import json
+import os
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from ai_engine import run_jd_digest
+from jd_minhash import NEAR_DUP_THRESHOLD, normalize_jd, minhash_signature, band_keys, estimated_similarity
+from vector_store import embeddings
+
+# Send the condensed JD (title + keywords + requirements) to the LLM instead of the full text
+JD_CONDENSE = os.getenv("JD_CONDENSE", "1") == "1"
+
+MAX_CANDIDATES = 50
+
+
+def _record_hit(db: Session, jd: models.JobDescription) -> models.JobDescription:
+    db.query(models.JobDescription).filter(models.JobDescription.id == jd.id).update(
+        {models.JobDescription.hit_count: models.JobDescription.hit_count + 1}
+    )
+    db.commit()
+    return jd
+
+
+async def _store_digest(db: Session, jd: models.JobDescription):
+    """
+    Preprocesses a JD the first time it is repeated; one-off postings never
+    pay for the extra LLM round trip. A failed digest is stored as empty so
+    it is not retried, and the full JD text is used instead.
+    """
+    try:
+        digest = await asyncio.to_thread(run_jd_digest, jd.raw_text)
+        values = {
+            models.JobDescription.job_title: digest.job_title,
+            models.JobDescription.keywords: json.dumps(digest.keywords),
+            models.JobDescription.requirements_summary: digest.requirements_summary,
+        }
+    except Exception as e:
+        print(f"JD digest skipped, using full JD text: {e}")
+        values = {models.JobDescription.requirements_summary: ""}
+
+    # A concurrent repeat may have stored it first
+    db.query(models.JobDescription).filter(
+        models.JobDescription.id == jd.id,
+        models.JobDescription.requirements_summary.is_(None)
+    ).update(values, synchronize_session=False)
+    db.commit()
+    db.refresh(jd)
+
+
+def _find_near_duplicate(db: Session, signature: np.ndarray, keys: list):
+    candidate_ids = [
+        row.jd_id for row in db.query(models.JobDescriptionBand.jd_id).filter(
+            models.JobDescriptionBand.band_key.in_(keys)
+        ).distinct().limit(MAX_CANDIDATES)
+    ]
+    if not candidate_ids:
+        return None
+
+    best, best_similarity = None, 0.0
+    for candidate in db.query(models.JobDescription).filter(models.JobDescription.id.in_(candidate_ids)):
+        similarity = estimated_similarity(signature, np.frombuffer(candidate.minhash, dtype=np.uint32))
+        if similarity > best_similarity:
+            best, best_similarity = candidate, similarity
+    return best if best_similarity >= NEAR_DUP_THRESHOLD else None
+
+
+async def get_or_create_jd(db: Session, jd_text: str) -> models.JobDescription:
+    """
+    Returns the stored JD matching jd_text exactly (after normalization),
+    creating it with its own embedding otherwise. The digest is added on the
+    first repeat.
+    A near-duplicate (MinHash) only lends its embedding: small wording changes
+    such as "Senior" -> "Junior" must still reach the LLM, so the digest and
+    title are never taken from a different posting.
+    """
+    normalized = normalize_jd(jd_text)
+    content_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    jd = db.query(models.JobDescription).filter(models.JobDescription.content_hash == content_hash).first()
+    if jd is not None:
+        if jd.requirements_summary is None:
+            await _store_digest(db, jd)
+        return _record_hit(db, jd)
+
+    signature = minhash_signature(normalized)
+    keys = band_keys(signature)
+    near_duplicate = _find_near_duplicate(db, signature, keys)
+
+    if near_duplicate is not None and near_duplicate.embedding:
+        print(f"🔁 Near-duplicate JD (id={near_duplicate.id}): reusing its embedding")
+        vector = np.frombuffer(near_duplicate.embedding, dtype=np.float32)
+    else:
+        vector = await asyncio.to_thread(embeddings.embed_query, jd_text)
+
+    jd = models.JobDescription(
+        content_hash=content_hash,
+        raw_text=jd_text,
+        minhash=signature.tobytes(),
+        embedding=np.asarray(vector, dtype=np.float32).tobytes(),
+        bands=[models.JobDescriptionBand(band_key=key) for key in keys]
+    )
+    db.add(jd)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another worker stored the same JD first
+        db.rollback()
+        return db.query(models.JobDescription).filter(models.JobDescription.content_hash == content_hash).first()
+    db.refresh(jd)
+    return jd
+
+
+def load_jd_embedding(jd: models.JobDescription):
+    if not jd.embedding:
+        return None
+    return np.frombuffer(jd.embedding, dtype=np.float32)
+
+
+def canonical_jd_text(jd: models.JobDescription, jd_text: str) -> str:
+    """
+    The JD text sent to the LLM: the stored digest of this exact JD when it is
+    shorter, else the request's own jd_text.
+    """
+    if not JD_CONDENSE or not jd.requirements_summary:
+        return jd_text
+
+    parts = []
+    if jd.job_title:
+        parts.append(f"Job Title: {jd.job_title}")
+    if jd.keywords:
+        parts.append(f"Required Keywords: {', '.join(json.loads(jd.keywords))}")
+    parts.append(f"Requirements:\n{jd.requirements_summary}")
+    condensed = "\n".join(parts)
+    return condensed if len(condensed) < len(jd_text) else jd_text
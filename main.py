@@ -1,22 +1,28 @@
-from fastapi import FastAPI, UploadFile, Form, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, Form, HTTPException, Depends, Request
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-import shutil
+import asyncio
 import os
 import uuid
 from dotenv import load_dotenv
 
 # Imports
-from utils import extract_text_from_pdf, extract_text_from_image, convert_pdf_to_docx, update_word_resume
-from vector_store import setup_vector_store, get_relevant_context
+from utils import extract_text_from_pdf, extract_text_from_image
+from exporter import export_pdf, export_base_docx, export_docx, content_digest, shutdown_pool
+from vector_store import setup_vector_store, get_relevant_context, get_relevant_context_precomputed, RAG_MIN_CHARS
 from ai_engine import run_agent_workflow
+from resume_library import save_resume, get_user_resume, pin_base_docx, load_chunk_embeddings
+from jd_store import get_or_create_jd, canonical_jd_text, load_jd_embedding
 from schemas import (
     AgentResponse, UserCreate, UserResponse, Token, LoginRequest,
-    DashboardResponse, DashboardStats, ActivityItem
+    DashboardResponse, DashboardStats, ActivityItem, ResumeResponse
 )
-from database import engine, get_db, Base
+from database import get_db, init_db
+from storage import storage
 from auth import get_password_hash, verify_password, create_access_token, get_current_user
+from admission import admit, saturation
+from serialization import fast_json_response, parse_fields
 import models
 
 load_dotenv()
@@ -29,10 +35,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create database tables on startup
-Base.metadata.create_all(bind=engine)
+# Create database tables on startup (runs once in the master when preloaded)
+init_db()
 
-os.makedirs("generated_resumes", exist_ok=True)
+OUTPUT_FORMATS = {"docx", "pdf", "both"}
+
+MEDIA_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".pdf": "application/pdf",
+}
+
+
+@app.on_event("shutdown")
+def shutdown_export_workers():
+    shutdown_pool()
 
 
 # --- AUTH ENDPOINTS ---
@@ -79,6 +95,7 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 
 @app.get("/dashboard", response_model=DashboardResponse, tags=["Dashboard"])
 async def get_dashboard(
+    request: Request,
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -98,7 +115,7 @@ async def get_dashboard(
         improvements = [a.optimized_score - a.original_score for a in current_user.activities]
         avg_improvement = sum(improvements) / total
     
-    return DashboardResponse(
+    dashboard = DashboardResponse(
         user=UserResponse(
             id=current_user.id,
             email=current_user.email,
@@ -111,10 +128,12 @@ async def get_dashboard(
             latest_activities=[ActivityItem.model_validate(a) for a in activities]
         )
     )
+    return fast_json_response(request, dashboard)
 
 
 @app.get("/dashboard/activities", response_model=list[ActivityItem], tags=["Dashboard"])
 async def get_all_activities(
+    request: Request,
     skip: int = 0,
     limit: int = 20,
     current_user: models.User = Depends(get_current_user),
@@ -128,55 +147,152 @@ async def get_all_activities(
         models.ResumeActivity.user_id == current_user.id
     ).order_by(models.ResumeActivity.created_at.desc()).offset(skip).limit(limit).all()
     
-    return [ActivityItem.model_validate(a) for a in activities]
+    return fast_json_response(request, [ActivityItem.model_validate(a) for a in activities])
+
+
+# --- RESUME LIBRARY ENDPOINTS ---
+
+@app.post("/resumes", response_model=ResumeResponse, tags=["Resume Library"])
+async def upload_resume(
+    file: UploadFile,
+    _admitted: None = Depends(admit("ingest")),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Store a resume once so later analyses can reference it by id.
+    Uploading an identical file returns the existing resume.
+    Requires authentication.
+    """
+    file_bytes = await file.read()
+    return await save_resume(db, current_user, file_bytes, file.filename)
+
+
+@app.get("/resumes", response_model=list[ResumeResponse], tags=["Resume Library"])
+async def list_resumes(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List the user's stored resumes.
+    Requires authentication.
+    """
+    return db.query(models.Resume).filter(
+        models.Resume.user_id == current_user.id
+    ).order_by(models.Resume.updated_at.desc()).all()
+
+
+@app.put("/resumes/{resume_id}", response_model=ResumeResponse, tags=["Resume Library"])
+async def update_resume(
+    resume_id: int,
+    file: UploadFile,
+    _admitted: None = Depends(admit("ingest")),
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a new version of a stored resume, replacing its artifacts.
+    Requires authentication.
+    """
+    resume = get_user_resume(db, current_user, resume_id)
+    file_bytes = await file.read()
+    return await save_resume(db, current_user, file_bytes, file.filename, resume=resume)
 
 
 # --- RESUME GENERATION ENDPOINT (Updated with auth) ---
 
 @app.post("/generate-agent", response_model=AgentResponse, tags=["Resume Analysis"])
 async def generate_agent(
-    file: UploadFile,
+    request: Request,
+    file: Optional[UploadFile] = None,
     jd_text: str = Form(...),
+    resume_id: Optional[int] = Form(None),
+    output_format: str = Form("docx"),
+    fields: Optional[str] = None,
+    _admitted: None = Depends(admit("generate")),
     current_user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Analyze and optimize a resume against a job description.
+    Send either an uploaded `file` or the `resume_id` of a stored resume;
+    a stored resume skips upload, parsing, conversion and embedding.
+    output_format: "docx" (default), "pdf" or "both".
+    fields: optional comma-separated response fields to return, e.g.
+    ?fields=feedback.original_score,feedback.optimized_score,feedback.detailed_edits
     Requires authentication.
     """
-    # 1. Save Uploaded File
-    original_filename = file.filename
-    temp_pdf_path = f"temp_{original_filename}"
-    
-    with open(temp_pdf_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    include = parse_fields(AgentResponse, fields)
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail="output_format must be 'docx', 'pdf' or 'both'")
+    if (file is None) == (resume_id is None):
+        raise HTTPException(status_code=400, detail="Provide either a file or a resume_id")
+    want_docx = output_format in ("docx", "both")
+    want_pdf = output_format in ("pdf", "both")
+
+    # 1. Save Uploaded File (or load the stored resume)
+    resume = None
+    temp_pdf_path = None
+    pinned_docx_path = None
+    if resume_id is not None:
+        resume = get_user_resume(db, current_user, resume_id)
+        original_filename = resume.original_filename
+        source_digest = resume.content_hash
+    else:
+        original_filename = file.filename
+        temp_pdf_path = f"temp_{uuid.uuid4()}_{original_filename}"
+        file_bytes = await file.read()
+        source_digest = content_digest(file_bytes)
+
+        with open(temp_pdf_path, "wb") as buffer:
+            buffer.write(file_bytes)
     
     try:
         # 2. Text Extraction (AI ke liye raw text)
         raw_text = ""
-        if file.filename.endswith(".pdf"):
-            raw_text = extract_text_from_pdf(temp_pdf_path)
+        if resume is not None:
+            raw_text = resume.extracted_text
+        elif file.filename.endswith(".pdf"):
+            raw_text = await asyncio.to_thread(extract_text_from_pdf, temp_pdf_path)
         elif file.filename.endswith((".png", ".jpg", ".jpeg")):
-            raw_text = extract_text_from_image(temp_pdf_path)
+            raw_text = await asyncio.to_thread(extract_text_from_image, temp_pdf_path)
         else:
             raise HTTPException(status_code=400, detail="Invalid file type")
 
-        # 3. Conversion Strategy (PDF -> DOCX)
-        temp_docx_filename = f"converted_{uuid.uuid4()}.docx"
-        temp_docx_path = f"generated_resumes/{temp_docx_filename}"
-        
-        print("Converting PDF to DOCX...")
-        if file.filename.endswith(".pdf"):
-            conversion_success = convert_pdf_to_docx(temp_pdf_path, temp_docx_path)
-            if not conversion_success:
-                raise HTTPException(status_code=500, detail="Failed to convert PDF to Word")
-        else:
-            raise HTTPException(status_code=400, detail="Round-trip editing only supports PDF files.")
+        # 3. Conversion Strategy (PDF -> DOCX), only needed for DOCX output
+        docx_base_path = None
+        if want_docx:
+            if resume is not None:
+                if not resume.base_docx_filename:
+                    raise HTTPException(status_code=400, detail="Round-trip editing only supports PDF files.")
+                # Pinned now: a new version uploaded during the LLM call may delete the shared base
+                pinned_docx_path = await asyncio.to_thread(pin_base_docx, resume)
+                docx_base_path = pinned_docx_path
+            else:
+                if not file.filename.endswith(".pdf"):
+                    raise HTTPException(status_code=400, detail="Round-trip editing only supports PDF files.")
+                print("Converting PDF to DOCX...")
+                docx_base_path = await export_base_docx(temp_pdf_path, source_digest)
+                if docx_base_path is None:
+                    raise HTTPException(status_code=500, detail="Failed to convert PDF to Word")
 
         # 4. AI Processing
-        if len(raw_text) > 4000:
-            vector_db = setup_vector_store(raw_text)
-            context = get_relevant_context(vector_db, query=jd_text)
+        # Distinct JDs are preprocessed once; repeats reuse the embedding and condensed text
+        jd = await get_or_create_jd(db, jd_text)
+        jd_vector = load_jd_embedding(jd)
+        jd_for_llm = canonical_jd_text(jd, jd_text)
+        print(f"📋 JD #{jd.id}: sending {len(jd_for_llm)} of {len(jd_text)} chars to the LLM")
+
+        stored_chunks = load_chunk_embeddings(resume) if resume is not None else None
+        if stored_chunks is not None:
+            boundaries, vectors = stored_chunks
+            context = await asyncio.to_thread(
+                get_relevant_context_precomputed, raw_text, boundaries, vectors, query=jd_text, query_vector=jd_vector
+            )
+            print(f"📊 Using RAG (stored embeddings): Retrieved {len(context)} chars")
+        elif len(raw_text) > RAG_MIN_CHARS:
+            vector_db = await asyncio.to_thread(setup_vector_store, raw_text)
+            context = await asyncio.to_thread(get_relevant_context, vector_db, query=jd_text, query_vector=jd_vector)
             print(f"📊 Using RAG: Retrieved {len(context)} chars from vector store")
             print(f"📄 Context preview (first 500 chars): {context[:500]}...")
         else:
@@ -184,24 +300,40 @@ async def generate_agent(
             print(f"📊 Using full resume: {len(context)} chars")
 
         print("AI Analyzing & Generating Edits...")
-        feedback, message = run_agent_workflow(context, jd_text)
+        # Blocking LLM calls run in a thread so the loop keeps serving /health and the admission queue
+        feedback, message = await asyncio.to_thread(run_agent_workflow, context, jd_for_llm)
 
-        # 5. Apply Edits to DOCX
+        # 5. Apply Edits to DOCX / Render PDF
         print(f"✅ AI Generated {len(feedback.detailed_edits)} edits")
-        print("Applying Edits to DOCX...")
-        
-        edits_list = []
-        for edit in feedback.detailed_edits:
-            edits_list.append({
-                "original_text": edit.original_text,
-                "new_text": edit.new_text
-            })
-            print(f"  - {edit.section}: {edit.change_type}")
-            
-        final_docx_path = update_word_resume(temp_docx_path, edits_list, f"final_{uuid.uuid4()}.docx")
-
-        # 6. Generate Link
-        final_filename = os.path.basename(final_docx_path)
+
+        final_docx_path = None
+        if want_docx:
+            print("Applying Edits to DOCX...")
+            edits_list = []
+            for edit in feedback.detailed_edits:
+                edits_list.append({
+                    "original_text": edit.original_text,
+                    "new_text": edit.new_text
+                })
+                print(f"  - {edit.section}: {edit.change_type}")
+
+            final_docx_path = await export_docx(docx_base_path, source_digest, edits_list)
+            if final_docx_path is None:
+                raise HTTPException(status_code=500, detail="Failed to build Word file")
+
+        final_pdf_path = None
+        if want_pdf:
+            print("Rendering PDF...")
+            final_pdf_path = await export_pdf(feedback.rewritten_content)
+            if final_pdf_path is None:
+                raise HTTPException(status_code=500, detail="Failed to render PDF")
+
+        # 6. Generate Links
+        pdf_download_url = None
+        if final_pdf_path:
+            pdf_download_url = f"http://localhost:8000/download/{os.path.basename(final_pdf_path)}"
+
+        final_filename = os.path.basename(final_docx_path or final_pdf_path)
         download_url = f"http://localhost:8000/download/{final_filename}"
 
         # 7. Save Activity to Database
@@ -211,17 +343,24 @@ async def generate_agent(
             modified_filename=final_filename,
             original_score=feedback.original_score,
             optimized_score=feedback.optimized_score,
+            job_title=jd.job_title,
             download_link=download_url
         )
         db.add(activity)
         db.commit()
         print(f"📝 Activity saved for user: {current_user.username}")
 
-        return AgentResponse(
+        response = AgentResponse(
             feedback=feedback, 
             message=message,
-            file_download_link=download_url 
+            file_download_link=download_url,
+            pdf_download_link=pdf_download_url
         )
+        return fast_json_response(request, response, include=include)
+
+    except HTTPException:
+        # Keep the intended 4xx/5xx instead of wrapping it in a generic 500
+        raise
 
     except Exception as e:
         import traceback
@@ -229,9 +368,10 @@ async def generate_agent(
         raise HTTPException(status_code=500, detail=str(e))
         
     finally:
-        # Cleanup temp PDF only (Keep DOCX for download)
-        if os.path.exists(temp_pdf_path):
-            os.remove(temp_pdf_path)
+        # Cleanup temp PDF and pinned base only (Keep DOCX for download)
+        for temp_path in (temp_pdf_path, pinned_docx_path):
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
 
 
 # --- DOWNLOAD ENDPOINT ---
@@ -241,22 +381,27 @@ async def download_file(filename: str):
     """
     Download a generated resume file.
     """
-    file_path = f"generated_resumes/{filename}"
-    if os.path.exists(file_path):
-        return FileResponse(
-            file_path, 
-            media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document', 
-            filename=filename
-        )
-    else:
+    extension = os.path.splitext(filename)[1].lower()
+    # May download from S3 first, so keep it off the event loop
+    response = await asyncio.to_thread(storage.response, filename, MEDIA_TYPES.get(extension, "application/octet-stream"))
+    if response is None:
         raise HTTPException(status_code=404, detail="File not found")
+    return response
 
 
 # --- HEALTH CHECK ---
 
 @app.get("/health", tags=["Health"])
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint.
+    Returns 503 while this worker is saturated so the load balancer can route around it.
     """
-    return {"status": "healthy", "message": "Jobalyze API is running"}
\ No newline at end of file
+    load = saturation()
+    if any(endpoint["saturated"] for endpoint in load.values()):
+        return fast_json_response(
+            request,
+            {"status": "saturated", "message": "Jobalyze API is at capacity", "load": load},
+            status_code=503
+        )
+    return fast_json_response(request, {"status": "healthy", "message": "Jobalyze API is running", "load": load})
\ No newline at end of file
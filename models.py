@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -16,6 +16,7 @@ class User(Base):
     
     # Relationship to activities
     activities = relationship("ResumeActivity", back_populates="user")
+    resumes = relationship("Resume", back_populates="user")
 
 
 class ResumeActivity(Base):
@@ -34,3 +35,53 @@ class ResumeActivity(Base):
     
     # Relationship back to user
     user = relationship("User", back_populates="activities")
+
+
+class Resume(Base):
+    """A user's stored resume with its preprocessed artifacts, reusable across analyses"""
+    __tablename__ = "resumes"
+    __table_args__ = (UniqueConstraint("user_id", "content_hash"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    original_filename = Column(String, nullable=False)
+    content_hash = Column(String, index=True, nullable=False)  # SHA-256 of the uploaded file
+    extracted_text = Column(Text, nullable=False)
+    base_docx_filename = Column(String, nullable=True)  # Only for PDF uploads
+    chunk_boundaries = Column(Text, nullable=True)  # JSON list of [start, end] offsets
+    chunk_embeddings = Column(LargeBinary, nullable=True)  # float32 matrix, one row per chunk
+    chunk_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationship back to user
+    user = relationship("User", back_populates="resumes")
+
+
+class JobDescription(Base):
+    """A distinct job description with its preprocessed artifacts, shared by all users"""
+    __tablename__ = "job_descriptions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String, unique=True, index=True, nullable=False)  # SHA-256 of the normalized text
+    raw_text = Column(Text, nullable=False)
+    minhash = Column(LargeBinary, nullable=False)  # uint32 MinHash signature, for near-duplicate lookup
+    job_title = Column(String, nullable=True)
+    keywords = Column(Text, nullable=True)  # JSON list
+    requirements_summary = Column(Text, nullable=True)
+    embedding = Column(LargeBinary, nullable=True)  # float32 query embedding
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    bands = relationship("JobDescriptionBand", back_populates="job_description", cascade="all, delete-orphan")
+
+
+class JobDescriptionBand(Base):
+    """LSH band of a JD's MinHash signature; JDs sharing a band are near-duplicate candidates"""
+    __tablename__ = "job_description_bands"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    jd_id = Column(Integer, ForeignKey("job_descriptions.id"), index=True, nullable=False)
+    band_key = Column(String, index=True, nullable=False)
+    
+    job_description = relationship("JobDescription", back_populates="bands")
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from exporter import content_digest, export_base_docx
+from storage import storage
+from utils import extract_text_from_pdf, extract_text_from_image
+from vector_store import RAG_MIN_CHARS, split_into_chunks, embed_chunks
+
+
+def get_user_resume(db: Session, user: models.User, resume_id: int) -> models.Resume:
+    """Fetch a resume owned by the user, or 404"""
+    resume = db.query(models.Resume).filter(
+        models.Resume.id == resume_id,
+        models.Resume.user_id == user.id
+    ).first()
+    if resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return resume
+
+
+def pin_base_docx(resume: models.Resume) -> str:
+    """
+    Copies the stored base DOCX to a request-private temp file and returns its path.
+    A new version uploaded mid-request may delete the shared file, so the
+    request works from its own copy; the caller removes it when done.
+    """
+    path = storage.fetch(resume.base_docx_filename)
+    pinned_path = f"temp_{uuid.uuid4()}_{resume.base_docx_filename}"
+    try:
+        if path is None:
+            raise FileNotFoundError(resume.base_docx_filename)
+        shutil.copyfile(path, pinned_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail="Stored Word file is missing, please upload the resume again")
+    return pinned_path
+
+
+def load_chunk_embeddings(resume: models.Resume):
+    """
+    Returns (boundaries, vectors) for resumes long enough to use RAG, else None.
+    """
+    if not resume.chunk_embeddings:
+        return None
+    boundaries = json.loads(resume.chunk_boundaries)
+    vectors = np.frombuffer(resume.chunk_embeddings, dtype=np.float32).reshape(len(boundaries), -1)
+    return boundaries, vectors
+
+
+async def save_resume(
+    db: Session,
+    user: models.User,
+    file_bytes: bytes,
+    filename: str,
+    resume: models.Resume = None
+) -> models.Resume:
+    """
+    Stores an uploaded resume with its extracted text, base DOCX and chunk embeddings.
+    Pass `resume` to upload a new version of it; its old artifacts are dropped
+    once the new version is saved.
+    Identical content is never processed twice.
+    """
+    content_hash = content_digest(file_bytes)
+    replacing = resume is not None
+
+    if resume is None:
+        existing = db.query(models.Resume).filter(
+            models.Resume.user_id == user.id,
+            models.Resume.content_hash == content_hash
+        ).first()
+        if existing is not None:
+            return existing
+        resume = models.Resume(user_id=user.id)
+    elif resume.content_hash == content_hash:
+        return resume
+    else:
+        duplicate = db.query(models.Resume).filter(
+            models.Resume.user_id == user.id,
+            models.Resume.content_hash == content_hash
+        ).first()
+        if duplicate is not None:
+            raise HTTPException(status_code=409, detail=f"This file is already stored as resume {duplicate.id}")
+    old_docx_filename = resume.base_docx_filename
+
+    # Build (or reuse) the new artifacts before touching the row, so a failed
+    # upload leaves the previous version intact
+    source = db.query(models.Resume).filter(
+        models.Resume.content_hash == content_hash
+    ).first()
+    if source is not None:
+        artifacts = {
+            "extracted_text": source.extracted_text,
+            "base_docx_filename": source.base_docx_filename,
+            "chunk_boundaries": source.chunk_boundaries,
+            "chunk_embeddings": source.chunk_embeddings,
+            "chunk_count": source.chunk_count,
+        }
+    else:
+        artifacts = await _build_artifacts(file_bytes, filename, content_hash)
+
+    for field, value in artifacts.items():
+        setattr(resume, field, value)
+    resume.original_filename = filename
+    resume.content_hash = content_hash
+    db.add(resume)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent upload of the same file by this user was saved first
+        db.rollback()
+        existing = db.query(models.Resume).filter(
+            models.Resume.user_id == user.id,
+            models.Resume.content_hash == content_hash
+        ).first()
+        if replacing:
+            raise HTTPException(status_code=409, detail=f"This file is already stored as resume {existing.id}")
+        return existing
+    db.refresh(resume)
+
+    if old_docx_filename and old_docx_filename != resume.base_docx_filename:
+        await _delete_if_unused(db, old_docx_filename)
+    return resume
+
+
+async def _build_artifacts(file_bytes: bytes, filename: str, content_hash: str) -> dict:
+    temp_path = f"temp_{uuid.uuid4()}_{filename}"
+    with open(temp_path, "wb") as buffer:
+        buffer.write(file_bytes)
+
+    try:
+        if filename.endswith(".pdf"):
+            text = await asyncio.to_thread(extract_text_from_pdf, temp_path)
+            docx_path = await export_base_docx(temp_path, content_hash)
+            if docx_path is None:
+                raise HTTPException(status_code=500, detail="Failed to convert PDF to Word")
+            docx_filename = os.path.basename(docx_path)
+        elif filename.endswith((".png", ".jpg", ".jpeg")):
+            text = await asyncio.to_thread(extract_text_from_image, temp_path)
+            docx_filename = None
+        else:
+            raise HTTPException(status_code=400, detail="Invalid file type")
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    artifacts = {
+        "extracted_text": text,
+        "base_docx_filename": docx_filename,
+        "chunk_boundaries": None,
+        "chunk_embeddings": None,
+        "chunk_count": 0,
+    }
+
+    # Short resumes are sent whole, so only long ones need embeddings
+    if len(text) > RAG_MIN_CHARS:
+        boundaries = await asyncio.to_thread(split_into_chunks, text)
+        vectors = await asyncio.to_thread(embed_chunks, text, boundaries)
+        artifacts["chunk_boundaries"] = json.dumps(boundaries)
+        artifacts["chunk_embeddings"] = vectors.tobytes()
+        artifacts["chunk_count"] = len(boundaries)
+    return artifacts
+
+
+async def _delete_if_unused(db: Session, docx_filename: str):
+    """Drop the base DOCX of a replaced version unless another resume still uses it"""
+    still_used = db.query(models.Resume).filter(
+        models.Resume.base_docx_filename == docx_filename
+    ).first()
+    if still_used is None:
+        await asyncio.to_thread(storage.delete, docx_filename)
@@ -23,10 +23,16 @@ class LinkedInDraft(BaseModel):
     subject_line: str = Field(description="Professional and catchy subject")
     message_body: str = Field(description="The DM content, under 150 words")
 
+class JobDescriptionDigest(BaseModel):
+    job_title: str = Field(description="The role title as written in the JD")
+    keywords: List[str] = Field(description="Every skill, tool, technology and certification the JD asks for")
+    requirements_summary: str = Field(description="Requirements and responsibilities as short bullet lines, without marketing or benefits text")
+
 class AgentResponse(BaseModel):
     feedback: ResumeFeedback
     message: LinkedInDraft
-    file_download_link: str = Field(description="URL to download the updated resume PDF")
+    file_download_link: str = Field(description="URL to download the updated resume (DOCX, or PDF when only PDF was requested)")
+    pdf_download_link: Optional[str] = Field(default=None, description="URL to download the optimized resume rendered as PDF")
 
 
 # --- Auth Schemas ---
@@ -58,6 +64,21 @@ class LoginRequest(BaseModel):
     password: str
 
 
+# --- Resume Library Schemas ---
+
+class ResumeResponse(BaseModel):
+    """Schema for a stored resume (artifacts are not returned)"""
+    id: int
+    original_filename: str
+    content_hash: str
+    chunk_count: int
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 # --- Dashboard Schemas ---
 
 class ActivityItem(BaseModel):
@@ -0,0 +1,104 @@
+import gzip
+import os
+import typing
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4  # close to gzip speed, noticeably smaller output
+
+
+def to_json_bytes(content, include=None) -> bytes:
+    """
+    Serializes response content without FastAPI's jsonable_encoder pass.
+    Models go through pydantic-core's native JSON serializer, plain data through orjson.
+    """
+    if isinstance(content, BaseModel):
+        return content.model_dump_json(include=include).encode("utf-8")
+    if isinstance(content, list) and all(isinstance(item, BaseModel) for item in content):
+        return b"[" + b",".join(item.model_dump_json(include=include).encode("utf-8") for item in content) + b"]"
+    return orjson.dumps(content)
+
+
+def parse_fields(model: type, fields: str):
+    """
+    Turns ?fields=feedback.original_score,feedback.detailed_edits into a pydantic
+    `include` spec for `model`. Returns None (everything) when fields is empty.
+    """
+    if not fields:
+        return None
+
+    include = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        current_model, node = model, include
+        parts = path.split(".")
+        for i, part in enumerate(parts):
+            if current_model is None or part not in current_model.model_fields:
+                raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+            annotation = current_model.model_fields[part].annotation
+            is_list = typing.get_origin(annotation) in (list, typing.List)
+            if is_list:
+                annotation = typing.get_args(annotation)[0]
+            current_model = annotation if isinstance(annotation, type) and issubclass(annotation, BaseModel) else None
+
+            if i == len(parts) - 1:
+                node[part] = True
+                break
+            if node.get(part) is True:
+                break  # parent already fully included
+            child = node.setdefault(part, {})
+            if is_list:
+                child = child.setdefault("__all__", {})
+            node = child
+    return include
+
+
+def _accepted_encodings(request: Request) -> set:
+    """Encodings from Accept-Encoding, minus the ones refused with q=0"""
+    encodings = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        token, *params = item.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            encodings.add(token)
+    return encodings
+
+
+def fast_json_response(request: Request, content, include=None, status_code: int = 200) -> Response:
+    """JSON response with the fast encoder and negotiated br/gzip compression"""
+    body = to_json_bytes(content, include=include)
+    headers = {"Vary": "Accept-Encoding"}
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encodings = _accepted_encodings(request)
+        if brotli is not None and "br" in encodings:
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in encodings:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,96 @@
+import os
+
+from fastapi.responses import FileResponse
+
+# Directory every worker reads and writes generated files in.
+# Point it at a shared mount (NFS etc.) to serve several nodes.
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "generated_resumes")
+
+
+class LocalStorage:
+    """Generated files in a directory shared by all workers on this node (or mounted on every node)"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def local_path(self, name: str) -> str:
+        return f"{self.root}/{name}"
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self.local_path(name))
+
+    def publish(self, name: str):
+        """Make a file written to local_path(name) visible to every worker"""
+        # Files are written with os.replace, so they are visible as soon as they exist
+
+    def fetch(self, name: str):
+        """Local path of the file, or None if it does not exist"""
+        path = self.local_path(name)
+        return path if os.path.exists(path) else None
+
+    def delete(self, name: str):
+        path = self.local_path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def response(self, name: str, media_type: str):
+        path = self.fetch(name)
+        if path is None:
+            return None
+        return FileResponse(path, media_type=media_type, filename=name)
+
+
+class S3Storage(LocalStorage):
+    """
+    Generated files in an S3-compatible bucket (AWS S3, or MinIO as a local stand-in).
+    The local directory is only a per-node cache.
+    """
+
+    def __init__(self, root: str, bucket: str, endpoint_url: str = None):
+        super().__init__(root)
+        import boto3  # only needed for this backend
+        from botocore.exceptions import ClientError
+        self._client_error = ClientError
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def exists(self, name: str) -> bool:
+        if super().exists(name):
+            return True
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+            return True
+        except self._client_error:
+            return False
+
+    def publish(self, name: str):
+        self.client.upload_file(self.local_path(name), self.bucket, name)
+
+    def fetch(self, name: str):
+        path = super().fetch(name)
+        if path is not None:
+            return path
+        tmp_path = f"{self.local_path(name)}.{os.getpid()}.part"
+        try:
+            self.client.download_file(self.bucket, name, tmp_path)
+        except self._client_error:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, self.local_path(name))
+        return self.local_path(name)
+
+    def delete(self, name: str):
+        super().delete(name)
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+
+def _create_storage():
+    backend = os.getenv("STORAGE_BACKEND", "local")
+    if backend == "s3":
+        return S3Storage(ARTIFACT_DIR, os.environ["S3_BUCKET"], os.getenv("S3_ENDPOINT_URL"))
+    return LocalStorage(ARTIFACT_DIR)
+
+
+storage = _create_storage()
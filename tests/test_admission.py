@@ -0,0 +1,146 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("jose")
+pytest.importorskip("sqlalchemy")
+
+from fastapi import HTTPException
+
+from admission import AdmissionController, TokenBucket
+
+
+def _controller(max_in_flight=1, max_queue=1, queue_timeout=0.05, rate=1 / 60, burst=2):
+    return AdmissionController("test", max_in_flight=max_in_flight, max_queue=max_queue,
+                               queue_timeout=queue_timeout, rate=rate, burst=burst)
+
+
+def _rejection(coro):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(coro)
+    return exc.value
+
+
+# --- TokenBucket ---
+
+def test_bucket_reports_wait_when_empty():
+    bucket = TokenBucket(rate=1 / 60, burst=1)
+    assert bucket.try_take() == 0
+    assert bucket.try_take() == pytest.approx(60, abs=1)
+
+
+def test_bucket_refund_is_capped_at_burst():
+    bucket = TokenBucket(rate=1 / 60, burst=1)
+    bucket.refund()
+    assert bucket.tokens == 1
+
+
+# --- Rate limit ---
+
+def test_429_with_retry_after_once_burst_is_spent():
+    controller = _controller(max_in_flight=5, burst=2)
+
+    async def scenario():
+        for _ in range(2):
+            await controller.acquire("alice")
+            controller.release()
+        await controller.acquire("alice")
+
+    error = _rejection(scenario())
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) == 60
+    assert controller.rejected == 1
+
+
+def test_rate_limit_is_per_user():
+    controller = _controller(max_in_flight=5, burst=1)
+
+    async def scenario():
+        await controller.acquire("alice")
+        await controller.acquire("bob")
+
+    asyncio.run(scenario())
+    assert controller.in_flight == 2
+
+
+# --- Capacity ---
+
+def test_503_when_queue_is_full_without_spending_a_token():
+    controller = _controller(max_in_flight=1, max_queue=0, burst=1)
+
+    async def scenario():
+        await controller.acquire("alice")
+        with pytest.raises(HTTPException) as exc:
+            await controller.acquire("bob")
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+    # Shed before the bucket was touched, so the retry is not rate limited
+    assert controller._bucket("bob").tokens == 1
+
+
+def test_queue_timeout_refunds_the_token():
+    controller = _controller(max_in_flight=1, max_queue=1, burst=1)
+
+    async def scenario():
+        await controller.acquire("alice")
+        with pytest.raises(HTTPException) as exc:
+            await controller.acquire("bob")
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert controller._bucket("bob").tokens == pytest.approx(1, abs=0.01)
+    assert controller.waiting == 0
+
+
+def test_cancelled_wait_refunds_the_token():
+    controller = _controller(max_in_flight=1, max_queue=1, queue_timeout=5, burst=1)
+
+    async def scenario():
+        await controller.acquire("alice")
+        waiter = asyncio.ensure_future(controller.acquire("bob"))
+        await asyncio.sleep(0.01)
+        assert controller.waiting == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+    assert controller._bucket("bob").tokens == pytest.approx(1, abs=0.01)
+    assert controller.waiting == 0
+    assert controller.in_flight == 1
+
+
+def test_release_frees_the_slot_for_a_waiter():
+    controller = _controller(max_in_flight=1, max_queue=1, queue_timeout=5)
+
+    async def scenario():
+        await controller.acquire("alice")
+        waiter = asyncio.ensure_future(controller.acquire("bob"))
+        await asyncio.sleep(0.01)
+        assert controller.is_saturated()
+        controller.release()
+        await waiter
+
+    asyncio.run(scenario())
+    assert controller.in_flight == 1
+    assert not controller.is_saturated()
+
+
+# --- Per-worker shares ---
+
+@pytest.mark.parametrize("total,count", [(8, 3), (4, 4), (4, 8), (1, 2)])
+def test_in_flight_shares_sum_to_configured_cap(total, count):
+    shares = []
+    for index in range(count):
+        controller = _controller(max_in_flight=total, max_queue=2)
+        controller.set_share(index, count)
+        shares.append(controller.max_in_flight)
+        if controller.max_in_flight == 0:
+            assert controller.is_saturated()
+    assert sum(shares) == total
+    assert max(shares) - min(shares) <= 1
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("xhtml2pdf")
+pytest.importorskip("pdf2docx")
+pytest.importorskip("docx")
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+import exporter
+from storage import LocalStorage
+
+
+# --- Worker stand-ins (run inside the pool, must stay top-level) ---
+
+def _fake_render(content: str, output_path: str) -> bool:
+    """Records each call next to the output, then writes it slowly"""
+    with open(os.path.join(os.path.dirname(output_path), "renders.log"), "a") as log:
+        log.write(content + "\n")
+    time.sleep(0.2)
+    with open(output_path, "w") as output:
+        output.write(content)
+    return True
+
+
+def _fake_edit(base_docx_path: str, edits: list, docx_path: str) -> bool:
+    with open(base_docx_path) as base:
+        return _fake_render(base.read() + "".join(edit["new_text"] for edit in edits), docx_path)
+
+
+def _failing_render(content: str, output_path: str) -> bool:
+    return False
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "storage", LocalStorage(str(tmp_path)))
+    yield tmp_path
+    exporter.shutdown_pool()
+
+
+def _renders(artifacts):
+    log = artifacts / "renders.log"
+    return log.read_text().splitlines() if log.exists() else []
+
+
+def test_concurrent_identical_exports_render_once(artifacts):
+    async def scenario():
+        return await asyncio.gather(*[
+            exporter._run_once("k", "out.txt", _fake_render, "hello", exporter.storage.local_path("out.txt"))
+            for _ in range(4)
+        ])
+
+    paths = asyncio.run(scenario())
+    assert len(set(paths)) == 1
+    assert open(paths[0]).read() == "hello"
+    assert _renders(artifacts) == ["hello"]
+    assert exporter._inflight == {}
+
+
+def test_second_export_hits_the_cache(artifacts):
+    def render():
+        return exporter._run_once("k", "out.txt", _fake_render, "hello", exporter.storage.local_path("out.txt"))
+
+    first = asyncio.run(render())
+    second = asyncio.run(render())
+    assert first == second
+    assert _renders(artifacts) == ["hello"]
+
+
+def test_failed_render_is_not_cached(artifacts):
+    path = asyncio.run(exporter._run_once("k", "out.txt", _failing_render, "x", exporter.storage.local_path("out.txt")))
+    assert path is None
+    assert not exporter.storage.exists("out.txt")
+    assert exporter._inflight == {}
+
+
+def test_export_docx_dedups_and_caches_per_edits(artifacts, monkeypatch):
+    monkeypatch.setattr(exporter, "_build_edited_docx", _fake_edit)
+    base = artifacts / "converted_abc.docx"
+    base.write_text("base:")
+    edits = [{"original_text": "a", "new_text": "b"}]
+
+    async def scenario():
+        return await asyncio.gather(*[exporter.export_docx(str(base), "abc", edits) for _ in range(3)])
+
+    paths = asyncio.run(scenario())
+    assert len(set(paths)) == 1
+    assert open(paths[0]).read() == "base:b"
+
+    # Same edits hit the cache; different edits are a new file
+    assert asyncio.run(exporter.export_docx(str(base), "abc", edits)) == paths[0]
+    other = asyncio.run(exporter.export_docx(str(base), "abc", [{"original_text": "a", "new_text": "c"}]))
+    assert other != paths[0]
+    assert _renders(artifacts) == ["base:b", "base:c"]
+
+
+def test_export_docx_without_base_returns_none(artifacts):
+    assert asyncio.run(exporter.export_docx(str(artifacts / "converted_missing.docx"), "missing", [])) is None
@@ -0,0 +1,81 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from jd_minhash import (
+    NEAR_DUP_THRESHOLD, NUM_BANDS, NUM_PERMUTATIONS, SHINGLE_SIZE,
+    normalize_jd, minhash_signature, band_keys, estimated_similarity,
+)
+
+SENIOR_JD = """
+Senior Backend Engineer. We are looking for a Senior Backend Engineer with 5+ years of experience
+building scalable distributed systems in Python. You will design and own REST and GraphQL APIs
+built with FastAPI, run services on AWS using Docker, Kubernetes and Terraform, and work with
+PostgreSQL, Redis and Kafka every day. You will partner with product managers and designers to
+ship features end to end, review code, improve our CI/CD pipelines and on-call tooling, and help
+raise the quality bar across the engineering team. Strong communication skills, a bias for
+action and experience mentoring other engineers are expected. Nice to have: experience with
+machine learning pipelines, observability with Prometheus and Grafana, and open source work.
+"""
+
+JUNIOR_JD = SENIOR_JD.replace("Senior", "Junior").replace("5+ years", "1+ years")
+
+OTHER_JD = """
+Marketing Manager. Own our consumer brand campaigns across social media, email and paid search.
+You will manage a team of three, set the quarterly budget, work with external agencies, run
+A/B tests on landing pages and report on acquisition metrics to the leadership team. Experience
+with HubSpot, Google Analytics and Figma is a plus. We offer flexible hours and a hybrid office.
+"""
+
+
+def _jaccard(a: str, b: str) -> float:
+    def shingles(text):
+        words = normalize_jd(text).split()
+        return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    sa, sb = shingles(a), shingles(b)
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_normalize_jd_strips_noise_and_keeps_tech_tokens():
+    text = "<p>Senior  C++ / C# Engineer!</p>\n\nNode.js, CI/CD &amp; AWS"
+    assert normalize_jd(text) == "senior c++ / c# engineer node.js ci/cd amp aws"
+
+
+def test_signature_is_deterministic_uint32():
+    signature = minhash_signature(normalize_jd(SENIOR_JD))
+    assert signature.dtype == np.uint32
+    assert signature.shape == (NUM_PERMUTATIONS,)
+    assert np.array_equal(signature, minhash_signature(normalize_jd(SENIOR_JD)))
+
+
+def test_signature_of_short_text():
+    assert minhash_signature("python").shape == (NUM_PERMUTATIONS,)
+    assert minhash_signature("").shape == (NUM_PERMUTATIONS,)
+
+
+def test_formatting_only_changes_are_identical():
+    reformatted = "<div>" + SENIOR_JD.upper().replace(" ", "   ") + "</div>"
+    assert normalize_jd(reformatted) == normalize_jd(SENIOR_JD)
+
+
+def test_near_duplicate_posting_is_detected():
+    # Senior -> Junior is a near-duplicate by shingles; jd_store must still not reuse its digest
+    assert _jaccard(SENIOR_JD, JUNIOR_JD) >= NEAR_DUP_THRESHOLD
+    a = minhash_signature(normalize_jd(SENIOR_JD))
+    b = minhash_signature(normalize_jd(JUNIOR_JD))
+    assert estimated_similarity(a, b) == pytest.approx(_jaccard(SENIOR_JD, JUNIOR_JD), abs=0.1)
+    assert estimated_similarity(a, b) >= NEAR_DUP_THRESHOLD
+    assert set(band_keys(a)) & set(band_keys(b))
+
+
+def test_different_posting_is_not_a_near_duplicate():
+    a = minhash_signature(normalize_jd(SENIOR_JD))
+    c = minhash_signature(normalize_jd(OTHER_JD))
+    assert estimated_similarity(a, c) < 0.2
+    assert not set(band_keys(a)) & set(band_keys(c))
+
+
+def test_band_keys_are_per_band():
+    keys = band_keys(minhash_signature(normalize_jd(SENIOR_JD)))
+    assert len(keys) == NUM_BANDS
+    assert [key.split(":")[0] for key in keys] == [str(band) for band in range(NUM_BANDS)]
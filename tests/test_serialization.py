@@ -0,0 +1,135 @@
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("orjson")
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import serialization
+from schemas import AgentResponse, ResumeFeedback, ResumeEdit, LinkedInDraft
+from serialization import parse_fields, to_json_bytes, fast_json_response, _accepted_encodings
+
+
+def _request(accept_encoding=None):
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding is not None else []
+    return Request({"type": "http", "headers": headers})
+
+
+def _response(edits=3, content="# Resume\n"):
+    return AgentResponse(
+        feedback=ResumeFeedback(
+            missing_skills=["AWS"],
+            detailed_edits=[
+                ResumeEdit(section="Skills", change_type="Addition", original_text="N/A",
+                           new_text=f"AWS {i}", keywords_added=["AWS"])
+                for i in range(edits)
+            ],
+            original_score=40,
+            optimized_score=90,
+            rewritten_content=content,
+        ),
+        message=LinkedInDraft(subject_line="Hi", message_body="Dear Hiring Manager"),
+        file_download_link="http://localhost:8000/download/final.docx",
+    )
+
+
+# --- parse_fields ---
+
+def test_parse_fields_empty_means_everything():
+    assert parse_fields(AgentResponse, None) is None
+    assert parse_fields(AgentResponse, "") is None
+
+
+def test_parse_fields_nested():
+    include = parse_fields(AgentResponse, "feedback.original_score, feedback.optimized_score,file_download_link")
+    assert include == {
+        "feedback": {"original_score": True, "optimized_score": True},
+        "file_download_link": True,
+    }
+
+
+def test_parse_fields_list_items_use_all():
+    include = parse_fields(AgentResponse, "feedback.detailed_edits.new_text,feedback.detailed_edits.section")
+    assert include == {"feedback": {"detailed_edits": {"__all__": {"new_text": True, "section": True}}}}
+
+    body = json.loads(to_json_bytes(_response(edits=2), include=include))
+    assert body == {"feedback": {"detailed_edits": [
+        {"section": "Skills", "new_text": "AWS 0"},
+        {"section": "Skills", "new_text": "AWS 1"},
+    ]}}
+
+
+def test_parse_fields_parent_wins_over_child():
+    assert parse_fields(AgentResponse, "feedback,feedback.original_score") == {"feedback": True}
+    assert parse_fields(AgentResponse, "feedback.original_score,feedback") == {"feedback": True}
+
+
+@pytest.mark.parametrize("fields", ["nope", "feedback.nope", "file_download_link.deeper", "feedback.original_score.x"])
+def test_parse_fields_rejects_unknown(fields):
+    with pytest.raises(HTTPException) as exc:
+        parse_fields(AgentResponse, fields)
+    assert exc.value.status_code == 400
+
+
+# --- to_json_bytes ---
+
+def test_to_json_bytes_matches_pydantic():
+    response = _response()
+    assert json.loads(to_json_bytes(response)) == json.loads(response.model_dump_json())
+    assert json.loads(to_json_bytes([response, response])) == [json.loads(response.model_dump_json())] * 2
+
+
+def test_to_json_bytes_plain_data():
+    assert json.loads(to_json_bytes({"status": "healthy", "load": {"in_flight": 1}})) == {
+        "status": "healthy", "load": {"in_flight": 1}
+    }
+
+
+# --- Accept-Encoding negotiation ---
+
+@pytest.mark.parametrize("header, expected", [
+    (None, set()),
+    ("gzip", {"gzip"}),
+    ("gzip, br", {"gzip", "br"}),
+    ("br;q=0, gzip;q=0.5", {"gzip"}),
+    ("br; q=0.000, GZIP", {"gzip"}),
+    ("br;Q=0", set()),
+    ("gzip;q=bogus", set()),
+    ("gzip;q=1.0, identity", {"gzip", "identity"}),
+])
+def test_accepted_encodings(header, expected):
+    assert _accepted_encodings(_request(header)) == expected
+
+
+def test_small_bodies_are_not_compressed():
+    response = fast_json_response(_request("gzip, br"), {"status": "healthy"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_large_bodies_prefer_brotli():
+    big = _response(edits=50, content="# Resume\n" * 500)
+    response = fast_json_response(_request("gzip, br"), big)
+    if serialization.brotli is None:
+        assert response.headers["content-encoding"] == "gzip"
+    else:
+        assert response.headers["content-encoding"] == "br"
+        assert serialization.brotli.decompress(response.body) == to_json_bytes(big)
+
+
+def test_large_bodies_fall_back_to_gzip_when_br_refused():
+    big = _response(edits=50, content="# Resume\n" * 500)
+    response = fast_json_response(_request("br;q=0, gzip"), big)
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == to_json_bytes(big)
+
+
+def test_no_compression_without_accept_encoding():
+    big = _response(edits=50, content="# Resume\n" * 500)
+    response = fast_json_response(_request(), big)
+    assert "content-encoding" not in response.headers
+    assert response.body == to_json_bytes(big)
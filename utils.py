@@ -43,40 +43,56 @@ def extract_text_from_image(file_path: str) -> str:
     )
     return completion.choices[0].message.content
 
-def save_resume_as_pdf(markdown_content: str, output_filename: str):
-    """
-    Converts Markdown resume text into a formatted PDF file.
+# Simple & Professional CSS for Resume (compiled once, reused for every render)
+RESUME_CSS = """
+<style>
+    body { font-family: Helvetica, sans-serif; font-size: 10pt; line-height: 1.4; color: #333; }
+    h1 { color: #000; border-bottom: 2px solid #000; padding-bottom: 5px; margin-top: 20px; font-size: 18pt; text-transform: uppercase; }
+    h2 { color: #2c3e50; border-bottom: 1px solid #ccc; padding-bottom: 3px; margin-top: 15px; font-size: 14pt; }
+    h3 { color: #444; font-size: 12pt; margin-top: 10px; margin-bottom: 2px; font-weight: bold; }
+    ul { margin-top: 5px; padding-left: 20px; }
+    li { margin-bottom: 3px; text-align: justify; }
+    p { margin-bottom: 5px; }
+    strong { color: #000; }
+</style>
+"""
+
+# HTML shell split around the body so each render is a plain string join
+_HTML_HEAD = f"<html><head>{RESUME_CSS}</head><body>"
+_HTML_TAIL = "</body></html>"
+
+# One Markdown converter per process, reset between documents
+_markdown_converter = markdown.Markdown()
+
+
+def render_resume_html(markdown_content: str) -> str:
     """
-    # Simple & Professional CSS for Resume
-    css = """
-    <style>
-        body { font-family: Helvetica, sans-serif; font-size: 10pt; line-height: 1.4; color: #333; }
-        h1 { color: #000; border-bottom: 2px solid #000; padding-bottom: 5px; margin-top: 20px; font-size: 18pt; text-transform: uppercase; }
-        h2 { color: #2c3e50; border-bottom: 1px solid #ccc; padding-bottom: 3px; margin-top: 15px; font-size: 14pt; }
-        h3 { color: #444; font-size: 12pt; margin-top: 10px; margin-bottom: 2px; font-weight: bold; }
-        ul { margin-top: 5px; padding-left: 20px; }
-        li { margin-bottom: 3px; text-align: justify; }
-        p { margin-bottom: 5px; }
-        strong { color: #000; }
-    </style>
+    Converts Markdown resume text into the full HTML document used for PDF output.
     """
+    _markdown_converter.reset()
+    html_text = _markdown_converter.convert(markdown_content)
+    return _HTML_HEAD + html_text + _HTML_TAIL
 
-    # Convert Markdown to HTML
-    html_text = markdown.markdown(markdown_content)
-    full_html = f"<html><head>{css}</head><body>{html_text}</body></html>"
 
-    # Create folder if not exists
-    os.makedirs("generated_resumes", exist_ok=True)
-    file_path = f"generated_resumes/{output_filename}"
-    
-    # Write PDF
-    with open(file_path, "wb") as pdf_file:
+def render_resume_pdf(markdown_content: str, file_path: str) -> bool:
+    """
+    Renders Markdown resume text to a PDF at file_path.
+    Writes to a temp file first so readers never see a half-written PDF.
+    Safe to run inside a worker process.
+    """
+    full_html = render_resume_html(markdown_content)
+    tmp_path = f"{file_path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "wb") as pdf_file:
         pisa_status = pisa.CreatePDF(full_html, dest=pdf_file)
-    
+
     if pisa_status.err:
         print("PDF generation error")
-        return None
-    return file_path
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, file_path)
+    return True
+
 
 def convert_pdf_to_docx(pdf_path: str, docx_path: str):
     """
@@ -92,7 +108,7 @@ def convert_pdf_to_docx(pdf_path: str, docx_path: str):
         print(f"Conversion Error: {e}")
         return False
 
-def update_word_resume(input_path: str, edits: list, output_filename: str):
+def update_word_resume(input_path: str, edits: list, output_filename: str, output_dir: str = "generated_resumes"):
     """
     Applies text replacements to a DOCX file.
     edits: List of dicts [{'original_text': '...', 'new_text': '...'}]
@@ -122,7 +138,7 @@ def update_word_resume(input_path: str, edits: list, output_filename: str):
                     replace_in_paragraph(paragraph)
 
     # Save
-    os.makedirs("generated_resumes", exist_ok=True)
-    save_path = f"generated_resumes/{output_filename}"
+    os.makedirs(output_dir, exist_ok=True)
+    save_path = f"{output_dir}/{output_filename}"
     doc.save(save_path)
     return save_path
@@ -2,20 +2,28 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+import numpy as np
 import uuid
 
 # Free local embeddings (fast & good enough)
 embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
+# Resumes longer than this go through retrieval instead of being sent whole
+RAG_MIN_CHARS = 4000
+
+# Smaller chunks with more overlap ensure better section coverage
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 300
+RETRIEVAL_K = 10
+
 def setup_vector_store(text_content: str):
     """
     Ingests text, splits it, and stores in a volatile ChromaDB instance.
     """
     # 1. Split Text into Chunks
-    # Smaller chunks with more overlap ensure better section coverage
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=300
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
     )
     docs = [Document(page_content=text_content)]
     splits = text_splitter.split_documents(docs)
@@ -32,12 +40,58 @@ def setup_vector_store(text_content: str):
     
     return vectorstore
 
-def get_relevant_context(vectorstore, query: str):
+def get_relevant_context(vectorstore, query: str, query_vector=None):
     """
     Retrieves the most relevant parts of the resume for the JD.
     Increased k=10 to ensure all sections (Skills, Education, Projects, etc.) are captured.
+    Pass query_vector (a stored JD embedding) to skip embedding the query.
     """
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 10})
-    docs = retriever.invoke(query)
+    if query_vector is not None:
+        docs = vectorstore.similarity_search_by_vector([float(x) for x in query_vector], k=RETRIEVAL_K)
+    else:
+        retriever = vectorstore.as_retriever(search_kwargs={"k": RETRIEVAL_K})
+        docs = retriever.invoke(query)
     # Combine retrieved docs into a single string
-    return "\n\n".join([doc.page_content for doc in docs])
\ No newline at end of file
+    return "\n\n".join([doc.page_content for doc in docs])
+
+
+# --- Precomputed chunks/embeddings (resume library) ---
+
+def split_into_chunks(text_content: str) -> list:
+    """
+    Splits text the same way as setup_vector_store and returns the
+    chunk boundaries as [start, end] character offsets.
+    """
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True
+    )
+    splits = text_splitter.split_documents([Document(page_content=text_content)])
+    return [
+        [doc.metadata["start_index"], doc.metadata["start_index"] + len(doc.page_content)]
+        for doc in splits
+    ]
+
+
+def embed_chunks(text_content: str, boundaries: list) -> np.ndarray:
+    """
+    Embeds each chunk once; returns a float32 matrix (one row per chunk).
+    """
+    chunks = [text_content[start:end] for start, end in boundaries]
+    return np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+
+
+def get_relevant_context_precomputed(text_content: str, boundaries: list, vectors: np.ndarray, query: str,
+                                     query_vector=None):
+    """
+    Same retrieval as get_relevant_context, but against stored chunk embeddings,
+    so at most the query needs to be embedded.
+    """
+    if query_vector is None:
+        query_vector = embeddings.embed_query(query)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+    scores = (vectors @ query_vector) / np.where(norms == 0, 1.0, norms)
+    top = np.argsort(-scores)[:RETRIEVAL_K]
+    return "\n\n".join(text_content[boundaries[i][0]:boundaries[i][1]] for i in top)